@@ -4,12 +4,23 @@
 from __future__ import annotations
 
 import math
+import os
 import re
-import time
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # 速い JSON パーサがあれば使う（JSONDecodeError はどちらも ValueError のサブクラス）
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 # 無料API（APIキー不要）
 GEO_API_URL = "https://geoapi.heartrails.com/api/json"
@@ -17,15 +28,79 @@ EXPRESS_API_URL = "https://express.heartrails.com/api/json"
 
 REQUEST_TIMEOUT_SEC = 10
 
-# 外部APIは不安定になり得るので軽いリトライを入れる
+# 外部APIは不安定になり得るので軽いリトライを入れる（urllib3 の Retry に任せる）
 API_RETRY_COUNT = 2  # 追加リトライ回数（合計試行は 1 + API_RETRY_COUNT）
-API_RETRY_BACKOFF_SEC = 0.6  # 初回待機秒（指数バックオフ）
+API_RETRY_BACKOFF_SEC = 0.6  # バックオフ係数（指数バックオフ。Retry-After があればそちらを優先）
+API_RETRY_STATUS = (429, 500, 502, 503, 504)  # リトライ対象のHTTPステータス
 
 WALK_METERS_PER_MIN = 80  # 徒歩1分=80m（簡易換算）
 
-_SESSION = requests.Session()
+# 郵便番号/住所 -> 座標、座標 -> 駅 の対応はほぼ変わらないのでプロセス内でメモ化する
+# ※ lru_cache には有効期限がない。プロセスが生きている間は、cached_search の ttl や
+#   requests-cache の expire_after より長く古い結果を返し得る（件数だけで上限を掛ける）
+API_CACHE_MAXSIZE = 512
+
+# suggest の候補クエリ（キーワード × exact/like）のうち、最優先クエリが外れたときに
+# 残りを並列に投げる際の最大スレッド数。これを超える分はキューに積まれ、
+# 当たりが出た時点で取り消される（無料APIなので同時に投げる数は絞る）
+GEO_SUGGEST_MAX_WORKERS = 2
+
+# 複数住所をまとめて検索する際の最大並列数（無料APIなので控えめに）
+BATCH_SEARCH_MAX_WORKERS = 4
+
+# 接続プールの大きさ（バッチの各スレッドが suggest をさらに並列に投げる分までの目安）
+# ※ 厳密な上限ではない。geocode_address_to_xy は実行中の suggest を待たずに戻るため、
+#   その裏でスレッドが次の express / 次の住所に進み、一時的にこの本数を超えることがある
+HTTP_POOL_MAXSIZE = BATCH_SEARCH_MAX_WORKERS * GEO_SUGGEST_MAX_WORKERS
+
+# HTTPレスポンスのディスクキャッシュ（requests-cache / SQLite）
+# STATION_HTTP_CACHE=1 のときだけ有効（テスト等では素の requests を使う）
+HTTP_CACHE_ENABLED = os.environ.get("STATION_HTTP_CACHE") == "1"
+HTTP_CACHE_NAME = ".heartrails_cache"
+HTTP_CACHE_EXPIRE_SEC = 86400
+# 住所/郵便番号 -> 座標（GeoAPI）はほぼ変わらないので長めに持つ
+HTTP_CACHE_GEO_EXPIRE_SEC = 30 * 86400
+
+
+def _make_session() -> requests.Session:
+    if not HTTP_CACHE_ENABLED:
+        return requests.Session()
+
+    import requests_cache
+
+    # stale_if_error: API が落ちていても期限切れキャッシュで応答できるようにする
+    return requests_cache.CachedSession(
+        cache_name=HTTP_CACHE_NAME,
+        backend="sqlite",
+        expire_after=HTTP_CACHE_EXPIRE_SEC,
+        urls_expire_after={"geoapi.heartrails.com": HTTP_CACHE_GEO_EXPIRE_SEC},
+        allowable_methods=("GET",),
+        stale_if_error=True,
+    )
+
+
 _DEFAULT_HEADERS = {"User-Agent": "station-core/1.0"}
 
+# geoapi / express の両ホストへの接続はこのセッションのプールで keep-alive して使い回す
+_SESSION = _make_session()
+_SESSION.headers.update(_DEFAULT_HEADERS)
+# pool_maxsize は find_walkable_stations_batch × suggest の並列クエリがおおむね収まる大きさ
+# （HTTP_POOL_MAXSIZE）にする。超えた分は接続を使い捨てるだけで、待たされることはない
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=API_RETRY_COUNT,
+            backoff_factor=API_RETRY_BACKOFF_SEC,
+            status_forcelist=API_RETRY_STATUS,
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+        ),
+        pool_connections=4,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+    ),
+)
+
 # 全角数字・全角ハイフン類を半角へ寄せる
 _ZEN2HAN = str.maketrans(
     {
@@ -50,6 +125,20 @@ _ZEN2HAN = str.maketrans(
     }
 )
 
+# distance の単位ゆれ（全角 m/km・㎞・小数点）とカンマを1パスで吸収する
+_DISTANCE_TRANS = str.maketrans(
+    {
+        ord("ｍ"): "m",
+        ord("Ｍ"): "m",
+        ord("ｋ"): "k",
+        ord("Ｋ"): "k",
+        ord("㎞"): "km",
+        ord("．"): ".",
+        ord(","): None,
+        ord("，"): None,
+    }
+)
+
 # =========================
 # 路線名の全国向け 表示正規化
 # =========================
@@ -113,6 +202,12 @@ COMMON_REPLACES: Dict[str, str] = {
     "大阪高速鉄道": "大阪モノレール",
 }
 
+# COMMON_REPLACES を1パスで置換するための alternation（長いキーを優先して最長一致にする）
+# キー数が増えても入力の走査は1回で済む
+_COMMON_REPLACE_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(COMMON_REPLACES, key=len, reverse=True))
+)
+
 # 4) 路線名だけで出てくる“よく出る系”を、通称・短い表示に寄せる
 POPULAR_LINE_ALIASES: Dict[str, str] = {
     "りんかい線": "りんかい線",
@@ -125,14 +220,28 @@ POPULAR_LINE_ALIASES: Dict[str, str] = {
     "大阪モノレール": "大阪モノレール",
 }
 
-# 5) 都営/メトロ/市営地下鉄の“線”表記を整えるためのパターン
-_TOEI_LINE_RE = re.compile(r"^(都営)(.+線)$")
-_METRO_LINE_RE = re.compile(r"^(東京メトロ)(.+線)$")
-_SUBWAY_LINE_RE = re.compile(r"^(?P<prefix>.+地下鉄)(?P<rest>.+線)$")
+# 4') 通称寄せ → 最終上書き の2回の辞書引きを1回にまとめた表
+#     （通称寄せの結果にさらに LINE_NAME_OVERRIDES を当てる順序をそのまま合成する）
+_FINAL_LINE_MAP: Dict[str, str] = {
+    **LINE_NAME_OVERRIDES,
+    **{k: LINE_NAME_OVERRIDES.get(v, v) for k, v in POPULAR_LINE_ALIASES.items()},
+}
+
+# 5) 「◯◯市◯◯線」を「地下鉄◯◯線」に寄せるためのパターン
+#    ※ 都営/東京メトロの“線”表記は 2) の置換で既に揃っているので、ここでは扱わない
+_CITY_LINE_RE = re.compile(r"^(?P<city_name>.+?市)(?P<city_rest>.+線)$")
 
 # 6) 「〇〇市(営)地下鉄～～」を「地下鉄～～」に落とす（市名を出さない）
 _CITY_SUBWAY_STRIP_RE = re.compile(r"^(?P<city>.+?市)(?:営)?地下鉄\s*(?P<rest>.+)$")
 
+# 7) 郵便番号・住所・距離まわりの正規表現（呼び出しごとの再コンパイルを避ける）
+_WS_RE = re.compile(r"\s+")
+_POSTAL_RE = re.compile(r"〒?\s*(\d{3})\s*[-]?\s*(\d{4})")
+_POSTAL_STRIP_RE = re.compile(r"〒?\s*\d{3}[-]?\d{4}")
+_DIGITS_TAIL_RE = re.compile(r"[0-9\-]+.*$")
+_CHOME_TAIL_RE = re.compile(r"[一二三四五六七八九十〇零0-9]+丁目.*$")
+_DISTANCE_RE = re.compile(r"^([0-9]+(?:\.[0-9]+)?)\s*(km|m)?$", re.IGNORECASE)
+
 
 def _as_list(x: Any) -> List[Any]:
     if x is None:
@@ -142,54 +251,51 @@ def _as_list(x: Any) -> List[Any]:
     return [x]
 
 
+def _common_replace(m: re.Match) -> str:
+    return COMMON_REPLACES[m.group(0)]
+
+
 def _get_json(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
     """
     外部API呼び出しは一時的な失敗が起き得るので、
-    - 軽いリトライ
+    - 軽いリトライ（接続失敗・429/5xx のみ。セッションの Retry が担当）
     - JSONパース確認
     - API側 error フィールド検知
     をまとめて行う。
+    JSON不正や API の error 応答は再試行しても直らないので、リトライせずに失敗扱いにする。
     """
-    last_exc: Optional[BaseException] = None
-    total_attempts = 1 + API_RETRY_COUNT
+    try:
+        r = _SESSION.get(
+            url,
+            params=params,
+            timeout=REQUEST_TIMEOUT_SEC,
+        )
+        r.raise_for_status()
 
-    for attempt in range(1, total_attempts + 1):
         try:
-            r = _SESSION.get(
-                url,
-                params=params,
-                timeout=REQUEST_TIMEOUT_SEC,
-                headers=_DEFAULT_HEADERS,
-            )
-            r.raise_for_status()
-
-            try:
-                data = r.json()
-            except ValueError as e:
-                raise ValueError(f"API応答がJSONではありません: {url}") from e
-
-            if isinstance(data, dict) and data.get("error"):
-                raise ValueError(f"APIエラー: {data.get('error')}")
+            data = _json.loads(r.content)
+        except ValueError as e:
+            raise ValueError(f"API応答がJSONではありません: {url}") from e
 
-            if not isinstance(data, dict):
-                raise ValueError(f"API応答が想定外の型です: {type(data)}")
+        if isinstance(data, dict) and data.get("error"):
+            raise ValueError(f"APIエラー: {data.get('error')}")
 
-            return data
+        if not isinstance(data, dict):
+            raise ValueError(f"API応答が想定外の型です: {type(data)}")
 
-        except (requests.RequestException, ValueError) as e:
-            last_exc = e
-            if attempt < total_attempts:
-                time.sleep(API_RETRY_BACKOFF_SEC * (2 ** (attempt - 1)))
-                continue
-            raise RuntimeError(f"API呼び出しに失敗しました: {url}") from last_exc
+        return data
 
-    raise RuntimeError(f"API呼び出しに失敗しました: {url}") from last_exc
+    except (requests.RequestException, ValueError) as e:
+        raise RuntimeError(f"API呼び出しに失敗しました: {url}") from e
 
 
+@lru_cache(maxsize=2048)
 def normalize_text(s: str) -> str:
-    return (s or "").strip().translate(_ZEN2HAN)
+    # _ZEN2HAN は空白を変換しないので、translate してから1回だけ strip すればよい
+    return s.translate(_ZEN2HAN).strip() if s else ""
 
 
+@lru_cache(maxsize=4096)
 def normalize_line_name(line: str) -> str:
     """
     HeartRails Express が返す路線名の「見た目」を全国向けに整える。
@@ -201,47 +307,36 @@ def normalize_line_name(line: str) -> str:
       4) “よく出る系”の通称寄せ（ゆりかもめ/りんかい線 など）
       5) 最後に overrides で確定補正
       6) 仕上げに「〇〇市(営)地下鉄～～」は「地下鉄～～」へ（市名を出さない）
+
+    同じ路線名が何度も渡されるため、結果は lru_cache でメモ化する（純関数）。
+    表記ゆれ違いの入力が同じ路線名に寄ることも多いので、戻り値は intern して共有する。
     """
     if not line:
         return ""
 
     s = normalize_text(line)
 
+    # 既に確定表記（override/通称のキー）と完全一致するなら、以降の処理は不要
+    hit = _FINAL_LINE_MAP.get(s)
+    if hit:
+        return hit
+
     # 余計な空白を整理
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
 
     # まず「確度の高い」置換
-    for src, dst in COMMON_REPLACES.items():
-        s = s.replace(src, dst)
+    s = _COMMON_REPLACE_RE.sub(_common_replace, s)
 
     # 「◯◯市◯◯線」→「地下鉄◯◯線」寄せ（対象都市のみ）
-    m_city = re.match(r"^(?P<city>.+?市)(?P<rest>.+線)$", s)
+    m_city = _CITY_LINE_RE.match(s)
     if m_city:
-        city = m_city.group("city")
-        rest = m_city.group("rest")
+        city = m_city.group("city_name")
+        rest = m_city.group("city_rest")
         if "地下鉄" not in s and city in CITY_SUBWAY_PREFIX:
             s = f"{CITY_SUBWAY_PREFIX[city]}{rest}"
 
-    # 「都営」表記を整える（都営 + ○○線 に統一）
-    m_toei = _TOEI_LINE_RE.match(s)
-    if m_toei:
-        s = f"都営{m_toei.group(2)}"
-
-    # 「東京メトロ」表記を整える（東京メトロ + ○○線）
-    m_metro = _METRO_LINE_RE.match(s)
-    if m_metro:
-        s = f"東京メトロ{m_metro.group(2)}"
-
-    # 「○○地下鉄○○線」系の空白などを整える
-    m_subway = _SUBWAY_LINE_RE.match(s)
-    if m_subway:
-        s = f"{m_subway.group('prefix')}{m_subway.group('rest')}"
-
-    # “よく出る系”は通称寄せ（完全一致で安全に）
-    s = POPULAR_LINE_ALIASES.get(s, s)
-
-    # 最終上書き（例外吸収）
-    s = LINE_NAME_OVERRIDES.get(s, s)
+    # “よく出る系”は通称寄せ → 最終上書き（例外吸収）。どちらも完全一致で安全に
+    s = _FINAL_LINE_MAP.get(s, s)
 
     # 「〇〇市(営)地下鉄～～」は「地下鉄～～」に統一（市名を出さない）
     # ※「大阪メトロ」は対象外（"地下鉄" を含まないため）
@@ -249,7 +344,7 @@ def normalize_line_name(line: str) -> str:
     if m_strip:
         s = f"地下鉄{m_strip.group('rest')}"
 
-    return s
+    return sys.intern(s)
 
 
 @dataclass
@@ -273,7 +368,7 @@ def extract_postal_code7(address: str) -> Optional[str]:
     例: '〒980－0021仙台...' -> '9800021'
     """
     s = normalize_text(address)
-    m = re.search(r"〒?\s*(\d{3})\s*[-]?\s*(\d{4})", s)
+    m = _POSTAL_RE.search(s)
     if not m:
         return None
     return f"{m.group(1)}{m.group(2)}"
@@ -290,11 +385,10 @@ def parse_distance_to_meters(distance_value: Any) -> float:
     if isinstance(distance_value, (int, float)):
         return float(distance_value)
 
-    s = normalize_text(str(distance_value)).replace(",", "")
-    # 全角の単位ゆれを軽く吸収
-    s = s.replace("ｍ", "m").replace("ｋｍ", "km").replace("ＫＭ", "km").replace("Ｋm", "km").replace("㎞", "km")
+    # 全角の単位ゆれ・カンマを軽く吸収
+    s = normalize_text(str(distance_value)).translate(_DISTANCE_TRANS)
 
-    m = re.match(r"^([0-9]+(?:\.[0-9]+)?)\s*(km|m)?$", s, flags=re.IGNORECASE)
+    m = _DISTANCE_RE.match(s)
     if not m:
         return float("inf")
 
@@ -305,45 +399,77 @@ def parse_distance_to_meters(distance_value: Any) -> float:
     return val
 
 
+def _copy_rows(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # キャッシュ上の行を呼び出し側に変更されないよう、リストも dict も複製して返す
+    return [dict(row) for row in rows]
+
+
 def geo_search_by_postal(postal7: str) -> List[Dict[str, Any]]:
+    return _copy_rows(_geo_search_by_postal_cached(postal7))
+
+
+@lru_cache(maxsize=API_CACHE_MAXSIZE)
+def _geo_search_by_postal_cached(postal7: str) -> Tuple[Dict[str, Any], ...]:
     data = _get_json(GEO_API_URL, {"method": "searchByPostal", "postal": postal7})
-    return _as_list(data.get("response", {}).get("location"))
+    return tuple(_as_list(data.get("response", {}).get("location")))
 
 
 def geo_suggest(keyword: str, matching: str = "like") -> List[Dict[str, Any]]:
+    return _copy_rows(_geo_suggest_cached(keyword, matching))
+
+
+@lru_cache(maxsize=API_CACHE_MAXSIZE)
+def _geo_suggest_cached(keyword: str, matching: str) -> Tuple[Dict[str, Any], ...]:
     data = _get_json(GEO_API_URL, {"method": "suggest", "matching": matching, "keyword": keyword})
-    return _as_list(data.get("response", {}).get("location"))
+    return tuple(_as_list(data.get("response", {}).get("location")))
 
 
-def pick_best_location(locations: List[Dict[str, Any]], raw_address: str) -> Dict[str, Any]:
+def pick_best_location(locations: Sequence[Dict[str, Any]], raw_address: str) -> Dict[str, Any]:
     """
     候補が複数ある場合、住所に含まれる prefecture/city/town でスコアリングして一つ選ぶ
     """
     addr = normalize_text(raw_address)
 
-    def score(loc: Dict[str, Any]) -> Tuple[int, int]:
-        s = 0
+    # addr / normalize_text は既定引数で束縛し、1候補あたり各フィールドを1回だけ見る
+    def score(loc: Dict[str, Any], _addr: str = addr, _nt: Any = normalize_text) -> Tuple[int, int]:
+        get = loc.get
+        s = 1 if get("postal") else 0
+        text_len = 0
         for k in ("prefecture", "city", "town"):
-            v = loc.get(k)
-            if v and normalize_text(v) in addr:
+            v = get(k, "")
+            if v and _nt(v) in _addr:
                 s += 1
-        postal_bonus = 1 if loc.get("postal") else 0
-        text_len = sum(len(str(loc.get(k, ""))) for k in ("prefecture", "city", "town"))
-        return (s + postal_bonus, text_len)
+            text_len += len(str(v))
+        return (s, text_len)
 
     return max(locations, key=score)
 
 
+def _suggest_result_to_xy(locs: Sequence[Dict[str, Any]], raw_address: str) -> Optional[Tuple[float, float]]:
+    """suggest の結果から最適な候補の (x, y) を返す。候補なし/座標が読めない場合は None"""
+    if not locs:
+        return None
+    best = pick_best_location(locs, raw_address)
+    try:
+        return float(best["x"]), float(best["y"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=API_CACHE_MAXSIZE)
 def geocode_address_to_xy(raw_address: str) -> Tuple[float, float]:
     """
     住所 -> (x=経度, y=緯度)
     優先順位:
       1) 郵便番号が取れれば searchByPostal（安定）
       2) 取れなければ suggest(exact -> like)（曖昧さを少し下げる）
+         最優先クエリ（先頭キーワードの exact）をまず単独で投げ、外れたときだけ
+         残りを GEO_SUGGEST_MAX_WORKERS 本ずつ並列に投げる。採用は上の優先順位どおり
     """
     postal7 = extract_postal_code7(raw_address)
     if postal7:
-        locs = geo_search_by_postal(postal7)
+        # 内部では読むだけなので、複製せずキャッシュ上の行をそのまま使う
+        locs = _geo_search_by_postal_cached(postal7)
         if locs:
             best = pick_best_location(locs, raw_address)
             try:
@@ -352,32 +478,58 @@ def geocode_address_to_xy(raw_address: str) -> Tuple[float, float]:
                 raise ValueError("郵便番号検索の結果から緯度経度を取得できませんでした。") from e
 
     addr = normalize_text(raw_address)
-    addr = re.sub(r"〒?\s*\d{3}[-]?\d{4}", "", addr)  # 郵便番号除去
-    addr_no_digits = re.sub(r"[0-9\-]+.*$", "", addr)
-    addr_no_chome = re.sub(r"[一二三四五六七八九十〇零0-9]+丁目.*$", "", addr)
+    addr = _POSTAL_STRIP_RE.sub("", addr)  # 郵便番号除去
+    addr_no_digits = _DIGITS_TAIL_RE.sub("", addr)
+    addr_no_chome = _CHOME_TAIL_RE.sub("", addr)
 
     candidates = [addr_no_digits, addr_no_chome, addr]
+
+    # まず exact を試し、だめなら like（同じクエリは1回だけ）
+    tasks: List[Tuple[str, str]] = []
     for kw in candidates:
         kw = kw.strip()
         if len(kw) < 2:
             continue
-
-        # まず exact を試し、だめなら like
         for matching in ("exact", "like"):
-            locs = geo_suggest(kw, matching=matching)
-            if locs:
-                best = pick_best_location(locs, raw_address)
-                try:
-                    return float(best["x"]), float(best["y"])
-                except (KeyError, TypeError, ValueError):
-                    continue
+            if (kw, matching) not in tasks:
+                tasks.append((kw, matching))
+
+    if not tasks:
+        raise ValueError("住所から緯度経度を取得できませんでした（郵便番号7桁付きで試すと改善します）。")
+
+    # 大半はこの1リクエストで決まるので、ここはスレッドを使わずに投げる
+    kw, matching = tasks[0]
+    xy = _suggest_result_to_xy(_geo_suggest_cached(kw, matching), raw_address)
+    if xy:
+        return xy
+
+    rest = tasks[1:]
+    if rest:
+        ex = ThreadPoolExecutor(max_workers=min(GEO_SUGGEST_MAX_WORKERS, len(rest)))
+        try:
+            futs = [ex.submit(_geo_suggest_cached, kw, matching) for kw, matching in rest]
+            # 優先順位の高いものから結果を待つ（逐次実行と同じ結果になる）
+            # ※ 先読みするぶん、逐次実行なら投げずに済んだ suggest まで投げることがある
+            for fut in futs:
+                xy = _suggest_result_to_xy(fut.result(), raw_address)
+                if xy:
+                    return xy
+        finally:
+            # まだ始まっていないクエリは取り消す。実行中のもの（最大 GEO_SUGGEST_MAX_WORKERS 本）は
+            # 待たずに戻り、裏で完了させる（結果は _geo_suggest_cached のキャッシュに入る）
+            ex.shutdown(wait=False, cancel_futures=True)
 
     raise ValueError("住所から緯度経度を取得できませんでした（郵便番号7桁付きで試すと改善します）。")
 
 
 def express_get_near_stations(x_lng: float, y_lat: float) -> List[Dict[str, Any]]:
+    return _copy_rows(_express_get_near_stations_cached(x_lng, y_lat))
+
+
+@lru_cache(maxsize=API_CACHE_MAXSIZE)
+def _express_get_near_stations_cached(x_lng: float, y_lat: float) -> Tuple[Dict[str, Any], ...]:
     data = _get_json(EXPRESS_API_URL, {"method": "getStations", "x": x_lng, "y": y_lat})
-    return _as_list(data.get("response", {}).get("station"))
+    return tuple(_as_list(data.get("response", {}).get("station")))
 
 
 def find_walkable_stations(
@@ -391,6 +543,9 @@ def find_walkable_stations(
     - 徒歩分数は ceil(distance_m / 80)
     - 同名駅が路線ごとに重複するので駅名でまとめ、路線を / 連結できる形にする
     - 路線名は normalize_line_name() で全国向けに表記を整える
+    - 同じ住所（normalize_text 後）・同じ条件の結果はプロセス内でメモ化する
+    戻り値は (walk_minutes, distance_m, station_name) の昇順に整列済みで、
+    (駅名, 都道府県) ごとに1件（呼び出し側で並べ替え直す必要はない）
     """
     if not raw_address or not raw_address.strip():
         raise ValueError("住所が空です。")
@@ -401,43 +556,117 @@ def find_walkable_stations(
     if max_candidates <= 0:
         raise ValueError("表示件数は1以上を指定してください。")
 
-    x, y = geocode_address_to_xy(raw_address)
-    stations_raw = express_get_near_stations(x, y)
+    # キャッシュ上の StationResult（とその lines）は使い回されるので、呼び出し側には複製を渡す
+    cached = _find_walkable_stations_cached(normalize_text(raw_address), max_walk_min, max_candidates)
+    return [replace(r, lines=list(r.lines)) for r in cached]
+
+
+@lru_cache(maxsize=API_CACHE_MAXSIZE)
+def _find_walkable_stations_cached(
+    addr_norm: str,
+    max_walk_min: int,
+    max_candidates: int,
+) -> Tuple[StationResult, ...]:
+    """find_walkable_stations の本体（引数チェック済み・住所は normalize_text 済み）"""
+    x, y = geocode_address_to_xy(addr_norm)
+    stations_raw = _express_get_near_stations_cached(x, y)
 
     limit_m = max_walk_min * WALK_METERS_PER_MIN
 
-    # (駅名, 都道府県)でまとめて路線を結合（同名駅の別県を分けるため）
-    grouped: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    # ループ内で繰り返し参照する関数はローカルに束縛しておく
+    _normalize_line = normalize_line_name
+    _parse_distance = parse_distance_to_meters
+    _isfinite = math.isfinite
 
-    for st in stations_raw:
+    # 1パス目: 距離だけ見て、距離不明を落として近い順に並べる（路線名の正規化はしない）
+    # 同順位の駅の並びを応答順で決めるため、応答内の位置 i も持っておく
+    nearby: List[Tuple[int, str, int, Dict[str, Any]]] = []
+    for i, st in enumerate(stations_raw):
         name = st.get("name")
-        pref = st.get("prefecture", "")
-        line = normalize_line_name(st.get("line"))
-        dist_m = parse_distance_to_meters(st.get("distance"))
+        if not name:
+            continue
 
-        if not name or not line or not math.isfinite(dist_m):
+        dist_m = _parse_distance(st.get("distance"))
+        if not _isfinite(dist_m):
             continue
 
-        key = (str(name), str(pref))
-        if key not in grouped:
-            grouped[key] = {"name": str(name), "pref": str(pref), "lines": set(), "min_dist": dist_m}
+        nearby.append((int(round(dist_m)), str(name), i, st))
+
+    nearby.sort(key=lambda t: (t[0], t[1]))
+
+    # 2パス目: (駅名, 都道府県)でまとめて路線を結合（同名駅の別県を分けるため）
+    # 近い順に見るので、最初に出た距離がその駅の最短距離になる。
+    # 新しく採用する駅は徒歩圏内かつ max_candidates 件まで（正規化もその駅の分だけ）。
+    # 採用済みの駅の別路線は、その路線の距離が圏外でも結合する。
+    # max_candidates 件目と同じ (距離, 駅名) の別県の駅は、どれが残るかを応答順で決めるので
+    # いったんすべて採用しておく（boundary がその (距離, 駅名)）。
+    grouped: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    boundary: Optional[Tuple[int, str]] = None
+    for d, name, i, st in nearby:
+        key = (name, str(st.get("prefecture", "")))
+        g = grouped.get(key)
+        if g is None and (d > limit_m or (len(grouped) >= max_candidates and (d, name) != boundary)):
+            continue
+
+        line = _normalize_line(st.get("line"))
+        if not line:
+            continue
+
+        if g is None:
+            g = {"name": name, "lines": [], "dist_m": d, "first_seen": i}
+            grouped[key] = g
+            if len(grouped) == max_candidates:
+                boundary = (d, name)
+        elif i < g["first_seen"]:
+            # 応答で先に出た（遠い）路線があれば、その位置をこの駅の出現順とする
+            g["first_seen"] = i
+
+        # 1駅あたりの路線は数本なので、set より list + 線形探索の方が軽い
+        lines = g["lines"]
+        if line not in lines:
+            lines.append(line)
 
-        grouped[key]["lines"].add(str(line))
-        grouped[key]["min_dist"] = min(grouped[key]["min_dist"], dist_m)
+    # 徒歩分数は距離から決まるので (距離, 駅名) 順が (徒歩分数, 距離, 駅名) 順と一致する。
+    # 同順位（別県の同名駅が同じ距離）のときは応答で先に出た方を残す
+    ordered = sorted(grouped.values(), key=lambda g: (g["dist_m"], g["name"], g["first_seen"]))
 
     results: List[StationResult] = []
-    for g in grouped.values():
-        d = int(round(g["min_dist"]))
-        if d <= limit_m:
-            walk_min = int(math.ceil(d / WALK_METERS_PER_MIN))
-            results.append(
-                StationResult(
-                    station_name=g["name"],
-                    lines=sorted(list(g["lines"])),
-                    walk_minutes=walk_min,
-                    distance_m=d,
-                )
+    for g in ordered[:max_candidates]:
+        d = g["dist_m"]
+        walk_min = -(-d // WALK_METERS_PER_MIN)  # 整数のまま切り上げ除算
+        results.append(
+            StationResult(
+                station_name=g["name"],
+                lines=sorted(g["lines"]),
+                walk_minutes=walk_min,
+                distance_m=d,
             )
+        )
+
+    return tuple(results)
+
+
+def find_walkable_stations_batch(
+    raw_addresses: Iterable[str],
+    max_walk_min: int = 30,
+    max_candidates: int = 3,
+) -> List[List[StationResult]]:
+    """
+    複数の住所について find_walkable_stations をまとめて実行し、入力と同じ順で返す
+    - 通信待ちが大半なので、住所ごとの検索をスレッドで並列に流す
+    - 並列数は BATCH_SEARCH_MAX_WORKERS 件まで。各住所のジオコーディングもさらに
+      GEO_SUGGEST_MAX_WORKERS 本まで並列になるので、同時リクエストはおおよそ
+      HTTP_POOL_MAXSIZE（= 両者の積）本で、接続プールもその大きさにしてある
+      （裏で完了待ちの suggest が残るぶん一時的に超えることはあり、厳密な上限ではない）
+    - 同じ住所が複数含まれていても、各要素は別々の StationResult（キャッシュの複製）になる
+    - どれか1件でも失敗した場合は、その例外をそのまま送出する
+    """
+    addrs = list(raw_addresses)
+    if not addrs:
+        return []
+
+    def search(addr: str) -> List[StationResult]:
+        return find_walkable_stations(addr, max_walk_min=max_walk_min, max_candidates=max_candidates)
 
-    results.sort(key=lambda r: (r.walk_minutes, r.distance_m, r.station_name))
-    return results[:max_candidates]
+    with ThreadPoolExecutor(max_workers=min(BATCH_SEARCH_MAX_WORKERS, len(addrs))) as ex:
+        return list(ex.map(search, addrs))
@@ -1,11 +1,11 @@
 # streamlit_app.py
 # -*- coding: utf-8 -*-
 
+import html
 import re
 import unicodedata
 import streamlit as st
-import pandas as pd
-from station_core import find_walkable_stations
+from station_core import find_walkable_stations, normalize_text
 
 # =========================
 # ページ設定
@@ -39,6 +39,37 @@ st.markdown(
         margin: 0.6rem 0 0.2rem 0;
       }
 
+      /* 結果一覧は1つの markdown ブロックで描画する（ウィジェット数を増やさない） */
+      .result-row{
+        display: flex;
+        align-items: center;
+        gap: 1rem;
+        border: 1px solid #e5e7eb;
+        border-radius: 0.5rem;
+        padding: 0.6rem 1rem;
+        margin-bottom: 0.6rem;
+      }
+      .result-name{
+        flex: 3;
+        font-size: 1.5rem;
+        font-weight: 700;
+      }
+      .result-lines{
+        flex: 4;
+      }
+      .result-walk{
+        flex: 2;
+        text-align: right;
+      }
+      .result-walk-label{
+        font-size: 0.8rem;
+        color: #6b7280;
+      }
+      .result-walk-value{
+        font-size: 1.8rem;
+        font-weight: 600;
+      }
+
       /* コピペ欄は等幅フォント */
       .stTextArea textarea{
         font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas,
@@ -65,6 +96,16 @@ st.caption(
     "徒歩分は直線距離を「徒歩1分=80m」で換算した目安です（実際の徒歩ルート時間ではありません）。"
 )
 
+# 入力住所の長さの目安（これを外れるものは検索・キャッシュの前に弾く）
+ADDRESS_MIN_LEN = 2
+ADDRESS_MAX_LEN = 200
+
+# 正規化用のテーブル/正規表現は毎回作らないようにモジュールで1回だけ用意する
+# ハイフン類（‐ U+2010 〜 ‒ U+2012, –, —, ―, ー, －, −）を半角ハイフンへ
+_HYPHEN_TRANS = str.maketrans(dict.fromkeys("\u2010\u2011\u2012–—―ー－−", "-"))
+_ADDR_SPACES_RE = re.compile(r"[ 　\t]+")
+_STATION_SPACES_RE = re.compile(r"[ \t]+")
+
 # =========================
 # 正規化・整形関数
 # =========================
@@ -72,9 +113,8 @@ def normalize_address(addr: str) -> str:
     """住所の表記ゆれを正規化"""
     if not addr:
         return ""
-    s = unicodedata.normalize("NFKC", addr)
-    s = re.sub(r"[‐-‒–—―ー－−]", "-", s)
-    s = re.sub(r"[ 　\t]+", " ", s).strip()
+    s = unicodedata.normalize("NFKC", addr).translate(_HYPHEN_TRANS)
+    s = _ADDR_SPACES_RE.sub(" ", s).strip()
     return s
 
 
@@ -84,7 +124,7 @@ def normalize_station_name(name: str) -> str:
         return ""
     s = unicodedata.normalize("NFKC", name)
     s = s.replace("　", " ")
-    s = re.sub(r"[ \t]+", " ", s).strip()
+    s = _STATION_SPACES_RE.sub(" ", s).strip()
     return s
 
 
@@ -100,36 +140,38 @@ def safe_lines(lines, sep: str = "・") -> str:
     return "不明"
 
 
-def dedupe_and_sort(results):
-    """重複除去＋徒歩→距離→駅名で安定ソート"""
-    best = {}
+def dedupe_sorted(results):
+    """
+    整列済み（徒歩→距離→駅名）の結果から、同じ駅の2件目以降を除く（先勝ち＝最寄りが残る）
+    find_walkable_stations の戻り値は整列済みなのでこちらで足りる
+    （(駅名, 都道府県)で一意なので、ここで落ちるのは別県の同名駅だけ）
+    """
+    seen = set()
+    cleaned = []
     for r in results:
         name = getattr(r, "station_name", "") or ""
-        walk = getattr(r, "walk_minutes", 10**9)
-        dist = getattr(r, "distance_m", 10**12)
         key = str(getattr(r, "station_id", "") or getattr(r, "id", "") or name).strip()
-        if not key:
+        if not key or key in seen:
             continue
+        seen.add(key)
+        cleaned.append(r)
+    return cleaned
 
-        prev = best.get(key)
-        if prev is None:
-            best[key] = r
-        else:
-            if (walk, dist) < (
-                getattr(prev, "walk_minutes", 10**9),
-                getattr(prev, "distance_m", 10**12),
-            ):
-                best[key] = r
-
-    cleaned = list(best.values())
-    cleaned.sort(
+
+def dedupe_and_sort(results):
+    """
+    重複除去＋徒歩→距離→駅名で安定ソート（並び順が保証されない入力向け）
+    先にソートしておけば、各キーで最初に出たものが最寄り（徒歩→距離が最小）
+    """
+    ordered = sorted(
+        results,
         key=lambda r: (
             getattr(r, "walk_minutes", 10**9),
             getattr(r, "distance_m", 10**12),
             normalize_station_name(getattr(r, "station_name", "") or ""),
-        )
+        ),
     )
-    return cleaned
+    return dedupe_sorted(ordered)
 
 
 def station_label(r) -> str:
@@ -139,6 +181,23 @@ def station_label(r) -> str:
     return name if name.endswith("駅") else f"{name}駅"
 
 
+def format_result_row(r) -> str:
+    """結果1件分の表示HTML（駅名・路線は API 由来なのでエスケープする）"""
+    station = html.escape(station_label(r))
+    lines_str = html.escape(safe_lines(getattr(r, "lines", None), sep=" / "))
+    walk = int(getattr(r, "walk_minutes", 0))
+    return (
+        '<div class="result-row">'
+        f'<div class="result-name">{station}</div>'
+        f'<div class="result-lines">{lines_str}</div>'
+        '<div class="result-walk">'
+        '<div class="result-walk-label">徒歩</div>'
+        f'<div class="result-walk-value">{walk} 分</div>'
+        "</div>"
+        "</div>"
+    )
+
+
 def format_copy_block(r) -> str:
     station = station_label(r)
     walk = int(getattr(r, "walk_minutes", 0))
@@ -175,47 +234,83 @@ with st.form("form", clear_on_submit=False):
     col1, _ = st.columns([1, 8])
     検索 = col1.form_submit_button("検索")
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def cached_search(addr_norm, walk_min, max_candidates):
+@st.cache_data(ttl=86400, max_entries=1000, show_spinner=False)
+def cached_search(addr_norm: str, walk_min: int, max_candidates: int):
+    """
+    addr_norm は normalize_address() -> normalize_text() 済みの住所（キャッシュキーを揃えるため）。
+    呼び出し側で1回だけ正規化して渡すこと。
+    ※ 住所 -> 座標 は station_core 側で住所だけをキーにメモ化されるので、
+      徒歩上限や件数を変えても再ジオコーディングはしない
+    """
     return find_walkable_stations(addr_norm, max_walk_min=walk_min, max_candidates=max_candidates)
 
 # =========================
 # 検索処理
 # =========================
 if 検索:
-    addr_norm = normalize_address(住所)
+    # 表記ゆれをキャッシュキーの手前で潰して、同じ住所は同じエントリに当てる
+    addr_norm = normalize_text(normalize_address(住所))
 
+    # 入力チェックはスピナー/キャッシュより前にまとめて行う（不正なキーをキャッシュに載せない）
     if not addr_norm:
         st.error("住所が空です。入力してください。")
         st.stop()
 
-    max_candidates = max(表示件数 * 8, 30) if 候補取得を多めに else 表示件数
+    if len(addr_norm) < ADDRESS_MIN_LEN:
+        st.error("住所が短すぎます。市区町村名や郵便番号7桁を含めて入力してください。")
+        st.stop()
+
+    if len(addr_norm) > ADDRESS_MAX_LEN:
+        st.error(f"住所が長すぎます（{ADDRESS_MAX_LEN}文字以内で入力してください）。")
+        st.stop()
+
+    # 条件が前回と同じなら検索し直さない（結果は session_state から描画する）
+    params = (addr_norm, 徒歩上限分, 表示件数, 候補取得を多めに)
+    if st.session_state.get("last_search", {}).get("params") != params:
+        max_candidates = max(表示件数 * 8, 30) if 候補取得を多めに else 表示件数
+
+        with st.spinner("検索中..."):
+            results = cached_search(addr_norm, 徒歩上限分, max_candidates)
+
+        # 結果は station_core 側で整列済みなので並べ替えは不要（別県の同名駅だけ除く）
+        results = dedupe_sorted(results)[:表示件数]
+        # 路線の連結などの表示用HTML・コピペ用テキスト（とそのbytes）は検索時に1回だけ作り、
+        # 再実行時は使い回す（結果が変わったときだけ作り直される）
+        rows_html = "".join(format_result_row(r) for r in results)
+        text_lines = "\n".join(map(format_copy_block, results))
+        # 途中で失敗しても新旧が混ざらないよう、1回の代入でまとめて差し替える
+        st.session_state["last_search"] = {
+            "params": params,
+            "results": results,
+            "rows_html": rows_html,
+            "text": text_lines,
+            "text_bytes": text_lines.encode("utf-8"),
+        }
 
-    with st.spinner("検索中..."):
-        results = cached_search(addr_norm, 徒歩上限分, max_candidates)
+# =========================
+# 結果表示
+# =========================
+# 検索後にスライダー等を触って再実行されても、直近の結果をそのまま表示する
+if "last_search" in st.session_state:
+    last = st.session_state["last_search"]
+    results = last["results"]
+    walk_limit = last["params"][1]
 
     if not results:
         st.warning("徒歩圏内の駅が見つかりませんでした。")
         st.stop()
 
-    results = dedupe_and_sort(results)[:表示件数]
-
-    st.success(f"{len(results)}件表示（徒歩{徒歩上限分}分以内）")
+    st.success(f"{len(results)}件表示（徒歩{walk_limit}分以内）")
 
     st.subheader("結果（見やすい表示）")
-    for r in results:
-        with st.container(border=True):
-            c1, c2, c3 = st.columns([3, 4, 2])
-            c1.markdown(f"### {station_label(r)}")
-            c2.write(safe_lines(getattr(r, "lines", None), sep=" / "))
-            c3.metric("徒歩", f"{int(r.walk_minutes)} 分")
+    # 全件をまとめて1つの markdown で出す（件数が増えてもウィジェットは1つ）
+    st.markdown(last["rows_html"], unsafe_allow_html=True)
 
     st.subheader("コピペ用")
-    text_lines = "\n".join([format_copy_block(r) for r in results])
-    st.text_area("そのまま貼れます", value=text_lines, height=220)
+    st.text_area("そのまま貼れます", value=last["text"], height=220)
     st.download_button(
         label="テキストでダウンロード（.txt）",
-        data=text_lines.encode("utf-8"),
+        data=last["text_bytes"],
         file_name="stations.txt",
         mime="text/plain",
 )